@@ -0,0 +1,42 @@
+/*
+ * Client side part of the parks live mode: the server only sends the parks whose
+ * availability changed, they are accumulated here and applied on the map figure.
+ */
+
+var latest_parkings_availability = {};
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    parkings: {
+        apply_availability: function(base_figure, delta) {
+            if (delta && delta.changes) {
+                Object.assign(latest_parkings_availability, delta.changes);
+            }
+            var figure = Object.assign({}, base_figure);
+            figure.data = base_figure.data.map(function(trace) {
+                if (trace.uid !== "parkings") {
+                    return trace;
+                }
+                var customdata = trace.customdata.slice();
+                var colors = trace.marker.color.slice();
+                customdata.forEach(function(parking, index) {
+                    var change = latest_parkings_availability[parking[0]];
+                    if (change !== undefined) {
+                        // Unknown availability is sent as null
+                        customdata[index] = [
+                            parking[0],
+                            parking[1],
+                            change[0] === null ? "?" : change[0],
+                            change[1] === null ? "?" : change[1]
+                        ];
+                        colors[index] = change[2];
+                    }
+                });
+                return Object.assign({}, trace, {
+                    customdata: customdata,
+                    marker: Object.assign({}, trace.marker, {color: colors})
+                });
+            });
+            return figure;
+        }
+    }
+});
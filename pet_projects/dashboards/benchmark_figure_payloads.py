@@ -0,0 +1,114 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Process
+from pet_projects.dashboards.figure_process import encode_figure_arrays
+
+# Python
+import gzip
+import json
+import timeit
+import typing
+
+# Data science
+import numpy as np
+
+# Dashboard
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+LINES_NB = 50
+LINE_POINTS_NB = 2000
+SCATTER_POINTS_NB = 100000
+REPEAT_NB = 5
+
+##########################################################################################
+#                                       FUNCTIONS
+##########################################################################################
+
+
+def build_synthetic_figure(to_array: typing.Callable) -> typing.Dict:
+    """
+    Build a figure the way the dashboards do, with plotly graph objects: a layer of
+    lines (as the TAN lines) and a large scatter (as the iris clustering), its
+    coordinates being converted by to_array
+
+    :param to_array: the conversion applied to the coordinates arrays
+    :return: the figure
+    """
+    random_state = np.random.RandomState(0)
+    lines = [
+        go.Scattermapbox(
+            mode="lines",
+            lon=to_array(-1.55 + random_state.randn(LINE_POINTS_NB).cumsum() * 1e-4),
+            lat=to_array(47.21 + random_state.randn(LINE_POINTS_NB).cumsum() * 1e-4),
+        )
+        for _ in range(LINES_NB)
+    ]
+    scatter = go.Scatter(
+        mode="markers",
+        x=to_array(random_state.rand(SCATTER_POINTS_NB) * 8),
+        y=to_array(random_state.rand(SCATTER_POINTS_NB) * 4),
+        marker={"color": to_array(random_state.randint(0, 5, SCATTER_POINTS_NB))},
+    )
+    return {"data": lines + [scatter], "layout": go.Layout()}
+
+
+def benchmark_figure_encoding(
+    figure: typing.Dict, serialise: typing.Callable
+) -> typing.Tuple[float, int, int]:
+    """
+    Serialise a figure as the callbacks do before returning it, then encode it the way
+    Dash does for callback responses
+
+    :param figure: the figure
+    :param serialise: the serialisation applied by the callbacks
+    :return: the best encoding time in milliseconds, the payload size and the compressed
+    payload size in bytes
+    """
+    encoding_time = (
+        min(
+            timeit.repeat(
+                lambda: json.dumps(serialise(figure), cls=PlotlyJSONEncoder),
+                number=1,
+                repeat=REPEAT_NB,
+            )
+        )
+        * 1000
+    )
+    payload = json.dumps(serialise(figure), cls=PlotlyJSONEncoder).encode("utf-8")
+    return encoding_time, len(payload), len(gzip.compress(payload))
+
+
+def run_benchmark() -> None:
+    """
+    Compare the previous figure payloads (python lists) with numpy arrays and plotly.js
+    base64 typed arrays (encode_figure_arrays with PLOTLY_BINARY_ARRAYS enabled)
+    """
+    encodings = {
+        "python lists": (lambda array: array.tolist(), lambda figure: figure),
+        "numpy arrays": (np.asarray, lambda figure: figure),
+        "base64 typed arrays": (
+            np.asarray,
+            lambda figure: encode_figure_arrays(figure, binary=True),
+        ),
+    }
+    print(f"{'encoding':<20}{'time (ms)':>12}{'bytes':>14}{'gzip bytes':>14}")
+    for name, (to_array, serialise) in encodings.items():
+        encoding_time, size, compressed_size = benchmark_figure_encoding(
+            build_synthetic_figure(to_array), serialise
+        )
+        print(f"{name:<20}{encoding_time:>12.1f}{size:>14}{compressed_size:>14}")
+
+
+##########################################################################################
+#                                     RUNNING BENCHMARK
+##########################################################################################
+
+if __name__ == "__main__":
+    run_benchmark()
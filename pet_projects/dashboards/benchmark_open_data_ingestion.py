@@ -0,0 +1,117 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Process
+from pet_projects.dashboards.open_data_process import parse_open_data_records
+
+# Python
+import json
+import timeit
+import typing
+
+# Data science
+import pandas as pd
+import numpy as np
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+RECORDS_NB = 100000
+REPEAT_NB = 3
+
+##########################################################################################
+#                                       FUNCTIONS
+##########################################################################################
+
+
+def build_synthetic_response(records_nb: int = RECORDS_NB) -> bytes:
+    """
+    Build an open data API response body similar to the Nantes parks availability one
+
+    :param records_nb: the number of records
+    :return: the response body
+    """
+    random_state = np.random.RandomState(0)
+    records = [
+        {
+            "datasetid": "244400404_parkings-publics-nantes-disponibilites",
+            "recordid": f"{record_nb:040x}",
+            "fields": {
+                "grp_nom": f"Parking {record_nb}",
+                "grp_statut": int(random_state.randint(0, 6)),
+                "grp_disponible": int(random_state.randint(0, 500)),
+                "grp_exploitation": 500,
+                "grp_horodatage": "2020-03-19T10:00:00+00:00",
+            },
+            "geometry": {
+                "type": "Point",
+                "coordinates": [
+                    -1.55 + random_state.rand() * 0.1,
+                    47.21 + random_state.rand() * 0.1,
+                ],
+            },
+            "record_timestamp": "2020-03-19T10:00:00+00:00",
+        }
+        for record_nb in range(records_nb)
+    ]
+    return json.dumps({"nhits": records_nb, "records": records}).encode("utf-8")
+
+
+def ingest_with_json_normalize(content: bytes) -> pd.DataFrame:
+    """
+    Previous ingestion path: decode the body to a str, flatten the records with
+    json_normalize and prefix the park names row by row
+
+    :param content: the response body
+    :return: the records
+    """
+    json_normalize = getattr(pd, "json_normalize", None) or pd.io.json.json_normalize
+    records = json_normalize(json.loads(content.decode("utf-8"))["records"])
+    records["fields.grp_nom"] = records["fields.grp_nom"].apply(
+        lambda cell: f"Parking {cell}"
+    )
+    return records
+
+
+def ingest_with_typed_columns(content: bytes) -> pd.DataFrame:
+    """
+    Current ingestion path: parse the body into typed columns and prefix the park names
+    at once
+
+    :param content: the response body
+    :return: the records
+    """
+    records = parse_open_data_records(content)
+    return records.assign(
+        **{"fields.grp_nom": "Parking " + records["fields.grp_nom"].astype(str)}
+    )
+
+
+def run_benchmark() -> None:
+    """
+    Compare the previous and current ingestion paths on a synthetic response
+    """
+    content = build_synthetic_response()
+    ingestions: typing.Dict[str, typing.Callable] = {
+        "json_normalize": ingest_with_json_normalize,
+        "typed columns": ingest_with_typed_columns,
+    }
+    print(f"{RECORDS_NB} records, {len(content)} bytes")
+    print(f"{'ingestion':<20}{'time (ms)':>12}{'memory (bytes)':>18}")
+    for name, ingest in ingestions.items():
+        ingestion_time = (
+            min(timeit.repeat(lambda: ingest(content), number=1, repeat=REPEAT_NB))
+            * 1000
+        )
+        memory = ingest(content).memory_usage(deep=True).sum()
+        print(f"{name:<20}{ingestion_time:>12.1f}{memory:>18}")
+
+
+##########################################################################################
+#                                     RUNNING BENCHMARK
+##########################################################################################
+
+if __name__ == "__main__":
+    run_benchmark()
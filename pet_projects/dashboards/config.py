@@ -18,9 +18,29 @@ IRIS_DATA_PATH = os.path.join(INPUT_DATA, "iris.csv")
 
 # open_data_nantes.py
 MAP_TOKEN = os.path.join(CONFIG_DATA, "map_token")
-NANTES_DISTRICTS_INFO = "https://data.nantesmetropole.fr/api/records/1.0/search/?dataset=244400404_quartiers-nantes&rows=-1&facet=nom"
-NANTES_PARKINGS_INFO = "https://data.nantesmetropole.fr/api/records/1.0/search/?dataset=244400404_parkings-publics-nantes&rows=-1&facet=libcategorie&facet=libtype&facet=acces_pmr&facet=service_velo&facet=stationnement_velo&facet=stationnement_velo_securise&facet=moyen_paiement"
-NANTES_PARKINGS_AVAILABILITY = "https://data.nantesmetropole.fr/api/records/1.0/search/?dataset=244400404_parkings-publics-nantes-disponibilites&rows=-1&facet=grp_nom&facet=grp_statut"
+NANTES_OPEN_DATA_UPSTREAM_API = "https://data.nantesmetropole.fr"
+# Open data API base url, can target a stand-in API instead (see load_test.py)
+NANTES_OPEN_DATA_API = os.environ.get(
+    "NANTES_OPEN_DATA_API", NANTES_OPEN_DATA_UPSTREAM_API
+)
+NANTES_DISTRICTS_INFO = f"{NANTES_OPEN_DATA_API}/api/records/1.0/search/?dataset=244400404_quartiers-nantes&rows=-1&facet=nom"
+NANTES_PARKINGS_INFO = f"{NANTES_OPEN_DATA_API}/api/records/1.0/search/?dataset=244400404_parkings-publics-nantes&rows=-1&facet=libcategorie&facet=libtype&facet=acces_pmr&facet=service_velo&facet=stationnement_velo&facet=stationnement_velo_securise&facet=moyen_paiement"
+NANTES_PARKINGS_AVAILABILITY = f"{NANTES_OPEN_DATA_API}/api/records/1.0/search/?dataset=244400404_parkings-publics-nantes-disponibilites&rows=-1&facet=grp_nom&facet=grp_statut"
 TAN_STOPS = os.path.join(INPUT_DATA, "tan/stops.txt")
 TAN_SHAPES = os.path.join(INPUT_DATA, "tan/shapes.txt")
 TAN_LINES = os.path.join(INPUT_DATA, "tan/trips.txt")
+TAN_STOP_TIMES = os.path.join(INPUT_DATA, "tan/stop_times.txt")
+TAN_ROUTES_STOPS_INDEX = os.path.join(OUTPUT_DATA, "tan_routes_stops_index.npz")
+PARKINGS_LIVE_REFRESH_INTERVAL = 60 * 1000  # milliseconds
+PARKINGS_AVAILABILITY_HISTORY_SIZE = 20
+OPEN_DATA_REQUEST_TIMEOUT = 30  # seconds
+
+# figure_process.py
+# Encode figure arrays in the plotly.js base64 typed array format. It requires
+# plotly.js >= 2.28 (ie. dash >= 2.15) on the client side, the pinned dash 1.7 cannot
+# decode it
+PLOTLY_BINARY_ARRAYS = False
+
+# load_test.py
+RECORDED_RESPONSES = os.path.join(INPUT_DATA, "recorded/")
+LOAD_TEST_API_PORT = 8060
@@ -0,0 +1,82 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Config
+from pet_projects.dashboards.config import PLOTLY_BINARY_ARRAYS
+
+# Python
+import base64
+import typing
+
+# Data science
+import numpy as np
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+# Typed arrays supported by plotly.js, named after the numpy kind and size of their items
+PLOTLY_TYPED_ARRAY_DTYPES = ["f8", "f4", "i4", "u4", "i2", "u2", "i1", "u1"]
+
+
+##########################################################################################
+#                                       FUNCTIONS
+##########################################################################################
+
+
+def encode_plotly_typed_array(values: typing.Iterable) -> typing.Dict[str, str]:
+    """
+    Encode numerical values in the plotly.js base64 typed array format, eg. :
+    {"dtype": "f8", "bdata": "AAAAAAAA8D8AAAAAAAAAQA=="}
+    64 bits integers are not supported by plotly.js and are downcast to 32 bits when
+    possible, else converted to floats.
+
+    :param values: the numerical values
+    :return: the typed array specification
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "iu" and array.dtype.itemsize == 8:
+        info = np.iinfo(np.int32)
+        in_range = array.size == 0 or (
+            array.min() >= info.min and array.max() <= info.max
+        )
+        array = array.astype(np.int32 if in_range else np.float64)
+    elif f"{array.dtype.kind}{array.dtype.itemsize}" not in PLOTLY_TYPED_ARRAY_DTYPES:
+        array = array.astype(np.float64)
+    little_endian = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+    return {
+        "dtype": f"{array.dtype.kind}{array.dtype.itemsize}",
+        "bdata": base64.b64encode(little_endian.tobytes()).decode("ascii"),
+    }
+
+
+def encode_figure_arrays(
+    figure: typing.Any, binary: bool = PLOTLY_BINARY_ARRAYS
+) -> typing.Any:
+    """
+    Serialise a figure (plotly graph objects or dict) into plain dicts and lists, its
+    numerical numpy arrays and pd.Series being encoded as plotly.js typed arrays. This
+    runs on the built figure so that plotly graph objects never validate typed arrays,
+    which older plotly versions reject. Nothing is done if binary is disabled, see
+    PLOTLY_BINARY_ARRAYS.
+
+    :param figure: the figure, or any part of it
+    :param binary: whether to encode the numerical arrays
+    :return: the serialised figure
+    """
+    if not binary:
+        return figure
+    if hasattr(figure, "to_plotly_json"):
+        return encode_figure_arrays(figure.to_plotly_json(), binary)
+    if isinstance(figure, dict):
+        return {
+            key: encode_figure_arrays(value, binary) for key, value in figure.items()
+        }
+    if isinstance(figure, (list, tuple)):
+        return [encode_figure_arrays(value, binary) for value in figure]
+    if hasattr(figure, "dtype") and hasattr(figure, "ndim"):
+        if figure.ndim == 1 and figure.dtype.kind in "iuf":
+            return encode_plotly_typed_array(figure)
+        return np.asarray(figure).tolist()
+    return figure
@@ -14,10 +14,14 @@ from dash.dependencies import Input, Output
 # Process
 from pet_projects.dashboards.iris_process import (
     CLUSTERING_METHODS,
+    CLUSTERING_SWEEP_METHODS,
+    CLUSTERING_SWEEP_TIME_BUDGET,
     parse_iris_data,
     compute_pearson_correlation_coefficient,
     compute_clustering,
+    compute_clustering_sweep,
 )
+from pet_projects.dashboards.figure_process import encode_figure_arrays
 
 
 ##########################################################################################
@@ -82,13 +86,17 @@ clustering_method_dropdown = dcc.Dropdown(
 )
 clustering_cluster_nb_dropdown = dcc.Dropdown(
     id="clustering-cluster-nb-dropdown",
-    options=[{"label": cluster_nb, "value": cluster_nb} for cluster_nb in range(1, 6)],
+    options=[{"label": cluster_nb, "value": cluster_nb} for cluster_nb in range(1, 6)]
+    + [{"label": "Auto (best silhouette coefficient)", "value": "auto"}],
     style={"width": "400px"},
     placeholder="Select the number of clusters or components (default 3)",
 )
 clustering_scatter = dcc.Loading(
     children=dcc.Graph(id="clustering-scatter",), type="graph"
 )
+clustering_score_curve = dcc.Loading(
+    children=dcc.Graph(id="clustering-score-curve",), type="graph"
+)
 
 app.layout = html.Div(
     children=[
@@ -127,6 +135,11 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(id="clustering-plot", children=[clustering_scatter]),
+                html.Div(
+                    id="clustering-score-plot",
+                    children=[clustering_score_curve],
+                    style={"display": "none"},
+                ),
             ],
         ),
     ]
@@ -167,8 +180,8 @@ def update_correlation_scatter_figure(
     figure = {
         "data": [
             {
-                "x": x_data,
-                "y": y_data,
+                "x": x_data.to_numpy(),
+                "y": y_data.to_numpy(),
                 "text": IRIS_DATA["species"],
                 "mode": "markers",
                 "marker": {
@@ -191,11 +204,15 @@ def update_correlation_scatter_figure(
             "hovermode": "closest",
         },
     }
-    return figure
+    return encode_figure_arrays(figure)
 
 
 @app.callback(
-    Output("clustering-scatter", "figure"),
+    [
+        Output("clustering-scatter", "figure"),
+        Output("clustering-score-curve", "figure"),
+        Output("clustering-score-plot", "style"),
+    ],
     [
         Input("correlation-x-axis-dropdown", "value"),
         Input("correlation-y-axis-dropdown", "value"),
@@ -207,8 +224,8 @@ def update_clustering_scatter_figure(
     x_axis_dropdown_value: str,
     y_axis_dropdown_value: str,
     clustering_method: str,
-    cluster_nb: int,
-) -> typing.Dict:
+    cluster_nb: typing.Union[int, str],
+) -> typing.Tuple[typing.Dict, typing.Dict, typing.Dict]:
     """
     Callback aimed to update clustering scatter content by selecting x and y axis data
     sets and clustering method
@@ -218,8 +235,11 @@ def update_clustering_scatter_figure(
     :param y_axis_dropdown_value: the name of the data that will be displayed in the y
     axis
     :param clustering_method: the name of the clustering method
-    :param cluster_nb: the number of cluster
-    :return: the data and the layout content
+    :param cluster_nb: the number of cluster, or "auto" to select the one with the best
+    silhouette coefficient
+    :return: the data and the layout content of the clustering scatter and of the
+    silhouette coefficient curve, and the style of the curve, only displayed in "auto"
+    mode
     """
     if x_axis_dropdown_value is None:
         x_axis_dropdown_value = "sepal_length"
@@ -231,17 +251,56 @@ def update_clustering_scatter_figure(
         cluster_nb = 3
     x_data = IRIS_DATA[x_axis_dropdown_value]
     y_data = IRIS_DATA[y_axis_dropdown_value]
+    labels = None
+    score_curve_figure = {"data": [], "layout": {}}
+    score_curve_style = {"display": "none"}
+    if cluster_nb == "auto":
+        cluster_nb = 3
+        score_curve_style = {}
+        scores = {}
+        if clustering_method not in CLUSTERING_SWEEP_METHODS:
+            title = (
+                f"No automatic selection for {clustering_method}, "
+                f"{cluster_nb} clusters used"
+            )
+        else:
+            best_cluster_nb, scores, best_labels = compute_clustering_sweep(
+                x_data, y_data, clustering_method
+            )
+            if best_cluster_nb is None:
+                title = (
+                    f"No fit finished within {CLUSTERING_SWEEP_TIME_BUDGET} s, "
+                    f"{cluster_nb} clusters used"
+                )
+            else:
+                cluster_nb, labels = best_cluster_nb, best_labels
+                title = f"Best number of clusters: {best_cluster_nb}"
+        score_curve_figure = {
+            "data": [
+                {
+                    "x": list(scores.keys()),
+                    "y": list(scores.values()),
+                    "mode": "lines+markers",
+                },
+            ],
+            "layout": {
+                "title": title,
+                "xaxis": {"title": "Number of clusters", "dtick": 1},
+                "yaxis": {"title": "Silhouette coefficient"},
+                "hovermode": "closest",
+            },
+        }
+    if labels is None:
+        labels = compute_clustering(x_data, y_data, clustering_method, cluster_nb)
     figure = {
         "data": [
             {
-                "x": x_data,
-                "y": y_data,
+                "x": x_data.to_numpy(),
+                "y": y_data.to_numpy(),
                 "text": IRIS_DATA["species"],
                 "mode": "markers",
                 "marker": {
-                    "color": compute_clustering(
-                        x_data, y_data, clustering_method, cluster_nb,
-                    ),
+                    "color": labels,
                     "size": 20,
                     "line": {"width": 3, "color": "black"},
                 },
@@ -253,7 +312,7 @@ def update_clustering_scatter_figure(
             "hovermode": "closest",
         },
     }
-    return figure
+    return encode_figure_arrays(figure), score_curve_figure, score_curve_style
 
 
 ##########################################################################################
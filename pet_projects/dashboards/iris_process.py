@@ -8,12 +8,17 @@ from pet_projects.dashboards.config import IRIS_DATA_PATH
 # Python
 import random
 import typing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Data science
 import pandas as pd
 import numpy as np
 from decimal import Decimal
 import scipy.stats as ss
+from scipy.cluster.hierarchy import ward, fcluster
+from scipy.spatial.distance import squareform
 from sklearn.cluster import (
     KMeans,
     AffinityPropagation,
@@ -25,6 +30,7 @@ from sklearn.cluster import (
     Birch,
 )
 from sklearn.mixture import BayesianGaussianMixture
+from sklearn.metrics import pairwise_distances, silhouette_score
 
 ##########################################################################################
 #                                        CONSTANTS
@@ -42,6 +48,16 @@ CLUSTERING_METHODS = [
     "Birch",
 ]
 
+# Automatic selection of the number of clusters
+CLUSTERING_SWEEP_METHODS = [
+    "K-means",
+    "Ward hierarchical clustering",
+    "Bayesian gaussian mixtures",
+    "Birch",
+]
+CLUSTERING_SWEEP_CLUSTER_NBS = range(2, 6)
+CLUSTERING_SWEEP_TIME_BUDGET = 5  # seconds
+
 
 ##########################################################################################
 #                                       FUNCTIONS
@@ -174,3 +190,82 @@ def compute_clustering(
         brc = Birch(n_clusters=nb_clusters)
         brc.fit(mapped_data)
         return brc.predict(mapped_data)
+
+
+def compute_clustering_sweep(
+    x_data: pd.Series,
+    y_data: pd.Series,
+    method: str,
+    cluster_nbs: typing.Iterable[int] = CLUSTERING_SWEEP_CLUSTER_NBS,
+    time_budget: float = CLUSTERING_SWEEP_TIME_BUDGET,
+) -> typing.Tuple[typing.Optional[int], typing.Dict[int, float], np.array]:
+    """
+    Compute clustering for several numbers of clusters in parallel and select the best
+    one according to the silhouette coefficient:
+    https://scikit-learn.org/stable/modules/clustering.html#silhouette-coefficient
+    The pairwise distances are computed once and used both to score every fit and to
+    build the Ward tree, which is then cut at each number of clusters. For Birch, the
+    CF-tree is built once and only its subclusters are clustered at each number of
+    clusters. The time budget starts before these shared computations. Fits not
+    finished within it are left out of the selection: the pending ones are cancelled
+    while the running ones cannot be interrupted and finish in the background, in the
+    thread pool of this call only.
+
+    :param x_data: the x data set
+    :param y_data: the y data set
+    :param method: name of the algorithm used to perform clustering, among
+    CLUSTERING_SWEEP_METHODS
+    :param cluster_nbs: numbers of clusters to be tried
+    :param time_budget: maximum time in seconds for the whole sweep
+    :return: the best number of clusters (None if no fit finished in time), the
+    silhouette coefficient by number of clusters and the data set labels of the best fit
+    """
+    deadline = time.monotonic() + time_budget
+    mapped_data = np.column_stack([x_data, y_data])
+    distances = pairwise_distances(mapped_data)
+    if method == "Ward hierarchical clustering":
+        tree = ward(squareform(distances, checks=False))
+
+        def fit(nb_clusters: int) -> np.array:
+            return fcluster(tree, nb_clusters, criterion="maxclust") - 1
+
+    elif method == "Birch":
+        brc = Birch(n_clusters=None).fit(mapped_data)
+
+        def fit(nb_clusters: int) -> np.array:
+            subcluster_labels = AgglomerativeClustering(
+                n_clusters=min(nb_clusters, len(brc.subcluster_centers_))
+            ).fit_predict(brc.subcluster_centers_)
+            return subcluster_labels[brc.labels_]
+
+    else:
+
+        def fit(nb_clusters: int) -> np.array:
+            return compute_clustering(x_data, y_data, method, nb_clusters)
+
+    def fit_and_score(nb_clusters: int) -> typing.Tuple[float, np.array]:
+        labels = fit(nb_clusters)
+        if len(np.unique(labels)) < 2:
+            return -1.0, labels
+        return silhouette_score(distances, labels, metric="precomputed"), labels
+
+    cluster_nbs = list(cluster_nbs)
+    if time.monotonic() >= deadline:
+        return None, {}, None
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(cluster_nbs), os.cpu_count() or 1))
+    )
+    futures = {
+        executor.submit(fit_and_score, nb_clusters): nb_clusters
+        for nb_clusters in cluster_nbs
+    }
+    done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    for future in not_done:
+        future.cancel()
+    executor.shutdown(wait=False)
+    results = {futures[future]: future.result() for future in done}
+    scores = {nb_clusters: score for nb_clusters, (score, _) in sorted(results.items())}
+    if not scores:
+        return None, scores, None
+    best_cluster_nb = max(scores, key=scores.get)
+    return best_cluster_nb, scores, results[best_cluster_nb][1]
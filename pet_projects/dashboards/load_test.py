@@ -0,0 +1,353 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Config
+from pet_projects.dashboards.config import (
+    NANTES_DISTRICTS_INFO,
+    NANTES_PARKINGS_INFO,
+    NANTES_PARKINGS_AVAILABILITY,
+    NANTES_OPEN_DATA_API,
+    NANTES_OPEN_DATA_UPSTREAM_API,
+    RECORDED_RESPONSES,
+    LOAD_TEST_API_PORT,
+)
+
+# Python
+import argparse
+import itertools
+import os
+import random
+import threading
+import time
+import typing
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+# Data science
+import numpy as np
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+OPEN_DATA_ENDPOINTS = [
+    NANTES_DISTRICTS_INFO,
+    NANTES_PARKINGS_INFO,
+    NANTES_PARKINGS_AVAILABILITY,
+]
+
+# Callbacks driven by the load test: their output, as sent by the dash renderer, and
+# their inputs
+DASH_CALLBACKS = {
+    "update_map": {
+        "output": "map-base-figure.data",
+        "inputs": [("districts-dropdown", "value"), ("tan-lines-dropdown", "value")],
+    },
+    "update_correlation_scatter_figure": {
+        "output": "correlation-scatter.figure",
+        "inputs": [
+            ("correlation-x-axis-dropdown", "value"),
+            ("correlation-y-axis-dropdown", "value"),
+        ],
+    },
+    "update_clustering_scatter_figure": {
+        "output": "..clustering-scatter.figure...clustering-score-curve.figure..."
+        "clustering-score-plot.style..",
+        "inputs": [
+            ("correlation-x-axis-dropdown", "value"),
+            ("correlation-y-axis-dropdown", "value"),
+            ("clustering-method-dropdown", "value"),
+            ("clustering-cluster-nb-dropdown", "value"),
+        ],
+    },
+}
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+REQUESTS_PER_LEVEL = 200
+REQUEST_TIMEOUT = 60  # seconds
+
+##########################################################################################
+#                                   STAND-IN NANTES API
+##########################################################################################
+
+
+def get_dataset_name(url: str) -> str:
+    """
+    Return the name of the dataset requested from the open data API
+
+    :param url: the API endpoint
+    :return: the dataset name
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    return query["dataset"][0]
+
+
+def record_open_data_responses() -> None:
+    """
+    Fetch the open data API endpoints of config.py from the upstream API, whatever
+    NANTES_OPEN_DATA_API targets, and save their responses in the recorded responses
+    folder, one file per dataset
+    """
+    os.makedirs(RECORDED_RESPONSES, exist_ok=True)
+    for endpoint in OPEN_DATA_ENDPOINTS:
+        url = NANTES_OPEN_DATA_UPSTREAM_API + endpoint[len(NANTES_OPEN_DATA_API) :]
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        path = os.path.join(RECORDED_RESPONSES, f"{get_dataset_name(url)}.json")
+        with open(path, "wb") as recorded_response:
+            recorded_response.write(response.content)
+        print(f"Recorded {url} in {path}")
+
+
+def build_stand_in_api(
+    port: int = LOAD_TEST_API_PORT,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+) -> ThreadingHTTPServer:
+    """
+    Build a local HTTP server replaying the recorded open data API responses, with
+    a configurable latency and rate of failed (503) requests. The dashboards target it
+    when started with NANTES_OPEN_DATA_API=http://localhost:<port>. No response is
+    committed: they must be recorded first (record_open_data_responses), which is the
+    only step needing access to the open data API.
+
+    :param port: the port the server listens to
+    :param latency: the minimum response delay in seconds
+    :param jitter: the maximum extra response delay in seconds, drawn uniformly
+    :param failure_rate: the probability for a request to fail
+    :return: the server, to be started with serve_forever()
+    """
+    responses = {}
+    for url in OPEN_DATA_ENDPOINTS:
+        dataset_name = get_dataset_name(url)
+        path = os.path.join(RECORDED_RESPONSES, f"{dataset_name}.json")
+        with open(path, "rb") as recorded_response:
+            responses[dataset_name] = recorded_response.read()
+
+    class StandInApiHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            time.sleep(latency + random.uniform(0, jitter))
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            response = responses.get(query.get("dataset", [None])[0])
+            if response is None:
+                self.send_error(404)
+            elif random.random() < failure_rate:
+                self.send_error(503)
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return ThreadingHTTPServer(("localhost", port), StandInApiHandler)
+
+
+##########################################################################################
+#                                     LOAD TEST DRIVER
+##########################################################################################
+
+
+def find_component(
+    layout: typing.Dict, component_id: str
+) -> typing.Optional[typing.Dict]:
+    """
+    Find a component by id in a Dash layout, as returned by /_dash-layout
+
+    :param layout: the layout
+    :param component_id: the component id
+    :return: the component properties, None if not found
+    """
+    props = layout.get("props", {})
+    if props.get("id") == component_id:
+        return props
+    children = props.get("children")
+    if isinstance(children, dict):
+        children = [children]
+    for child in children if isinstance(children, list) else []:
+        if isinstance(child, dict):
+            component = find_component(child, component_id)
+            if component is not None:
+                return component
+    return None
+
+
+def draw_input_value(component: typing.Dict) -> typing.Any:
+    """
+    Draw a random value for a dropdown among its options, as a user would select it
+
+    :param component: the dropdown properties
+    :return: the value
+    """
+    values = [option["value"] for option in component.get("options", [])]
+    if component.get("multi"):
+        return random.sample(values, random.randint(0, min(3, len(values)))) or None
+    return random.choice(values + [None])
+
+
+def call_dash_callback(
+    session: requests.Session, app_url: str, layout: typing.Dict, callback: str
+) -> typing.Tuple[float, bool]:
+    """
+    Call a callback through the _dash-update-component endpoint with random inputs
+
+    :param session: the HTTP session
+    :param app_url: the url of the dashboard
+    :param layout: the dashboard layout
+    :param callback: the callback name, among DASH_CALLBACKS
+    :return: the latency in seconds and whether the call succeeded
+    """
+    inputs = [
+        {
+            "id": component_id,
+            "property": prop,
+            "value": draw_input_value(find_component(layout, component_id)),
+        }
+        for component_id, prop in DASH_CALLBACKS[callback]["inputs"]
+    ]
+    payload = {
+        "output": DASH_CALLBACKS[callback]["output"],
+        "inputs": inputs,
+        "changedPropIds": [f"{inputs[0]['id']}.{inputs[0]['property']}"],
+        "state": [],
+    }
+    start = time.perf_counter()
+    try:
+        response = session.post(
+            f"{app_url}/_dash-update-component", json=payload, timeout=REQUEST_TIMEOUT
+        )
+        succeeded = response.ok
+    except requests.RequestException:
+        succeeded = False
+    return time.perf_counter() - start, succeeded
+
+
+def run_load_test(
+    app_url: str,
+    concurrency_levels: typing.List[int] = CONCURRENCY_LEVELS,
+    requests_per_level: int = REQUESTS_PER_LEVEL,
+) -> typing.List[typing.Dict]:
+    """
+    Call the callbacks of a running dashboard at increasing concurrency levels. Only the
+    callbacks whose input components are in the dashboard layout are called, in turn.
+
+    :param app_url: the url of the dashboard
+    :param concurrency_levels: the numbers of simultaneous users
+    :param requests_per_level: the number of calls at each concurrency level
+    :return: the throughput, latency percentiles and error rate by concurrency level
+    and callback
+    """
+    layout = requests.get(f"{app_url}/_dash-layout", timeout=REQUEST_TIMEOUT).json()
+    callbacks = [
+        callback
+        for callback, specification in DASH_CALLBACKS.items()
+        if all(
+            find_component(layout, component_id) is not None
+            for component_id, _ in specification["inputs"]
+        )
+    ]
+    sessions = threading.local()
+
+    def call(callback: str) -> typing.Tuple[str, float, bool]:
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        latency, succeeded = call_dash_callback(
+            sessions.session, app_url, layout, callback
+        )
+        return callback, latency, succeeded
+
+    report = []
+    for concurrency in concurrency_levels:
+        calls = itertools.islice(itertools.cycle(callbacks), requests_per_level)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(call, calls))
+        duration = time.perf_counter() - start
+        for callback in callbacks:
+            latencies = np.array(
+                [latency for name, latency, _ in results if name == callback]
+            )
+            errors = [succeeded for name, _, succeeded in results if name == callback]
+            if not errors:
+                continue
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+            report.append(
+                {
+                    "concurrency": concurrency,
+                    "callback": callback,
+                    "requests": len(latencies),
+                    "throughput": len(latencies) / duration,
+                    "p50": p50,
+                    "p90": p90,
+                    "p99": p99,
+                    "error_rate": errors.count(False) / len(errors),
+                }
+            )
+    return report
+
+
+def print_report(report: typing.List[typing.Dict]) -> None:
+    """
+    Print the load test report as a table
+
+    :param report: the load test report
+    """
+    print(
+        f"{'users':>6} {'callback':<34}{'requests':>9}{'req/s':>9}"
+        f"{'p50 (ms)':>10}{'p90 (ms)':>10}{'p99 (ms)':>10}{'errors':>8}"
+    )
+    for row in report:
+        print(
+            f"{row['concurrency']:>6} {row['callback']:<34}{row['requests']:>9}"
+            f"{row['throughput']:>9.1f}{row['p50']:>10.0f}{row['p90']:>10.0f}"
+            f"{row['p99']:>10.0f}{row['error_rate']:>8.1%}"
+        )
+
+
+##########################################################################################
+#                                     RUNNING LOAD TEST
+##########################################################################################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test of the dashboards against a stand-in Nantes API. "
+        "No response is committed: first run 'record' once, which needs network "
+        "access to data.nantesmetropole.fr, then work offline: 'serve' the recorded "
+        "responses, start a dashboard with "
+        "NANTES_OPEN_DATA_API=http://localhost:<port> and 'run' the load test on it."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "record", help="record the open data API responses (needs network access)"
+    )
+    serve_parser = commands.add_parser("serve", help="serve the recorded responses")
+    serve_parser.add_argument("--port", type=int, default=LOAD_TEST_API_PORT)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    serve_parser.add_argument("--failure-rate", type=float, default=0.0)
+    run_parser = commands.add_parser("run", help="load test a running dashboard")
+    run_parser.add_argument("--app-url", default="http://localhost:8050")
+    run_parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=CONCURRENCY_LEVELS
+    )
+    run_parser.add_argument("--requests", type=int, default=REQUESTS_PER_LEVEL)
+    arguments = parser.parse_args()
+
+    if arguments.command == "record":
+        record_open_data_responses()
+    elif arguments.command == "serve":
+        stand_in_api = build_stand_in_api(
+            arguments.port, arguments.latency, arguments.jitter, arguments.failure_rate
+        )
+        print(f"Serving the recorded responses on http://localhost:{arguments.port}")
+        stand_in_api.serve_forever()
+    else:
+        print_report(
+            run_load_test(arguments.app_url, arguments.concurrency, arguments.requests)
+        )
@@ -6,20 +6,51 @@
 import typing
 import json
 import copy
+import collections
+import threading
 
 # Config
+from pet_projects.dashboards.config import PARKINGS_LIVE_REFRESH_INTERVAL
 from pet_projects.dashboards.open_data_nantes_process import (
     MAP_FIG,
+    PARKINGS_INFO,
     get_nantes_districts_data,
+    get_nantes_parkings_availability,
+    get_parkings_availability_snapshot,
+    compute_parkings_availability_delta,
+    record_parkings_availability_snapshot,
     get_and_parse_tan_lines,
+    get_tan_stops,
+    get_tan_routes_stops_index,
+    get_stops_of_tan_lines,
 )
+from pet_projects.dashboards.figure_process import encode_figure_arrays
 
 # Dashboard
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 import plotly.graph_objects as go
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State, ClientsideFunction
+from dash.exceptions import PreventUpdate
+
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+# Parks availability snapshots indexed by version, shared by all clients so that each one
+# only receives what changed since the version it displays
+PARKINGS_AVAILABILITY_HISTORY = collections.OrderedDict()
+PARKINGS_AVAILABILITY_LOCK = threading.Lock()
+INITIAL_PARKINGS_VERSION = record_parkings_availability_snapshot(
+    PARKINGS_AVAILABILITY_HISTORY, get_parkings_availability_snapshot(PARKINGS_INFO)
+)
+
+# Lines <-> stops index and stops coordinates used to display the stops of the selected
+# lines
+TAN_ROUTES_STOPS_INDEX = get_tan_routes_stops_index()
+TAN_STOPS_DATA = get_tan_stops().set_index("stop_id")
 
 
 ##########################################################################################
@@ -70,7 +101,15 @@ tan_lines_dropdown = dcc.Dropdown(
     style={"width": "400px", "margin-right": 5},
     placeholder="Select a tan line...",
 )
-mapbox = dcc.Graph(id="map", figure=MAP_FIG, animate=False)
+mapbox = dcc.Graph(id="map", figure=encode_figure_arrays(MAP_FIG), animate=False)
+map_base_figure = dcc.Store(id="map-base-figure", data=encode_figure_arrays(MAP_FIG))
+parkings_live_interval = dcc.Interval(
+    id="parkings-live-interval", interval=PARKINGS_LIVE_REFRESH_INTERVAL
+)
+parkings_live_version = dcc.Store(
+    id="parkings-live-version", data=INITIAL_PARKINGS_VERSION
+)
+parkings_live_delta = dcc.Store(id="parkings-live-delta", data={})
 
 app.layout = html.Div(
     children=[
@@ -95,6 +134,15 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(id="map-content", children=[mapbox]),
+                html.Div(
+                    id="map-live",
+                    children=[
+                        map_base_figure,
+                        parkings_live_interval,
+                        parkings_live_version,
+                        parkings_live_delta,
+                    ],
+                ),
             ],
         ),
     ]
@@ -107,7 +155,7 @@ app.layout = html.Div(
 
 
 @app.callback(
-    Output("map", "figure"),
+    Output("map-base-figure", "data"),
     [Input("districts-dropdown", "value"), Input("tan-lines-dropdown", "value")],
 )
 def update_map(
@@ -156,7 +204,61 @@ def update_map(
             )
             for _, row in selected_lines.iterrows()
         ]
-    return figure
+        selected_stops = TAN_STOPS_DATA.reindex(
+            get_stops_of_tan_lines(TAN_ROUTES_STOPS_INDEX, tan_lines)
+        ).dropna(subset=["stop_lat", "stop_lon"])
+        figure["data"].append(
+            go.Scattermapbox(
+                name="Stops",
+                mode="markers",
+                lon=selected_stops["stop_lon"].to_numpy(),
+                lat=selected_stops["stop_lat"].to_numpy(),
+                text=selected_stops["stop_name"],
+                hoverinfo="text",
+                showlegend=False,
+                marker={"size": 5, "color": "black"},
+            )
+        )
+    return encode_figure_arrays(figure)
+
+
+@app.callback(
+    [Output("parkings-live-delta", "data"), Output("parkings-live-version", "data")],
+    [Input("parkings-live-interval", "n_intervals")],
+    [State("parkings-live-version", "data")],
+)
+def update_parkings_availability(
+    n_intervals: int, client_version: str
+) -> typing.Tuple[typing.Dict, str]:
+    """
+    Poll the parks availability and send to the client only the parks whose availability
+    changed since the version it displays. If this version is not in the history of
+    this server process (too old, or recorded by another process), every park is sent.
+    It also runs on page load, as the layout holds the availability of the startup.
+
+    :param n_intervals: the number of times the interval elapsed
+    :param client_version: the version of the parks availability displayed by the client
+    :return: the changed parks and the new version displayed by the client
+    """
+    current_snapshot = get_parkings_availability_snapshot(
+        get_nantes_parkings_availability()
+    )
+    with PARKINGS_AVAILABILITY_LOCK:
+        version = record_parkings_availability_snapshot(
+            PARKINGS_AVAILABILITY_HISTORY, current_snapshot
+        )
+        previous_snapshot = PARKINGS_AVAILABILITY_HISTORY.get(client_version, {})
+    if version == client_version:
+        raise PreventUpdate
+    delta = compute_parkings_availability_delta(previous_snapshot, current_snapshot)
+    return {"version": version, "changes": delta}, version
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="parkings", function_name="apply_availability"),
+    Output("map", "figure"),
+    [Input("map-base-figure", "data"), Input("parkings-live-delta", "data")],
+)
 
 
 ##########################################################################################
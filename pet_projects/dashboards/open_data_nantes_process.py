@@ -11,21 +11,50 @@ from pet_projects.dashboards.config import (
     TAN_STOPS,
     TAN_SHAPES,
     TAN_LINES,
+    TAN_STOP_TIMES,
+    TAN_ROUTES_STOPS_INDEX,
+    PARKINGS_AVAILABILITY_HISTORY_SIZE,
 )
 
+# Process
+from pet_projects.dashboards.open_data_process import get_open_data_records
+
 # Python
-# import typing
-import requests
+import typing
+import collections
+import hashlib
 import json
+import os
 
 # Data science
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 
 # Dashboard
 import plotly.graph_objects as go
 
 
+##########################################################################################
+#                                         INDEXES
+##########################################################################################
+
+
+class TanRoutesStopsIndex(typing.NamedTuple):
+    """
+    Sparse incidence between the "Transports de l'Agglomération Nantaise" (TAN) lines
+    (rows) and the stops they serve (columns), kept in both row (lines -> stops) and
+    column (stops -> lines) compressed formats
+    """
+
+    routes_stops: sp.csr_matrix
+    stops_routes: sp.csr_matrix
+    routes: np.ndarray
+    stops: np.ndarray
+    route_positions: typing.Dict[str, int]
+    stop_positions: typing.Dict[str, int]
+
+
 ##########################################################################################
 #                                       FUNCTIONS
 ##########################################################################################
@@ -47,40 +76,195 @@ def get_nantes_districts_data() -> pd.DataFrame:
 
     :return: the Nantes districts data
     """
-    r_districts = requests.get(NANTES_DISTRICTS_INFO)
-    all_districts_info = pd.io.json.json_normalize(
-        json.loads(r_districts.text)["records"]
+    all_districts_info = get_open_data_records(NANTES_DISTRICTS_INFO).sort_values(
+        "fields.nom"
     )
-    all_districts_info.sort_values("fields.nom", inplace=True)
     return all_districts_info
 
 
+def get_nantes_parkings_availability() -> pd.DataFrame:
+    """
+    Retrieve the Nantes parks availability from the API and convert it into a
+    pd.DataFrame
+
+    :return: the Nantes parks availability
+    """
+    parkings_availability = get_open_data_records(NANTES_PARKINGS_AVAILABILITY)
+    parkings_availability = parkings_availability.assign(
+        **{
+            "fields.grp_nom": "Parking "
+            + parkings_availability["fields.grp_nom"].astype(str)
+        }
+    )
+    return parkings_availability
+
+
 def get_nantes_parkings_info() -> pd.DataFrame:
     """
     Retrieve the Nantes parks info from the API and convert it into a pd.DataFrame
 
     :return: the Nantes parks info
     """
-    r_all_parkings_info = requests.get(NANTES_PARKINGS_INFO)
-    all_parkings_info = pd.io.json.json_normalize(
-        json.loads(r_all_parkings_info.text)["records"]
-    )
-    r_parkings_availability = requests.get(NANTES_PARKINGS_AVAILABILITY)
-    parkings_availability = pd.io.json.json_normalize(
-        json.loads(r_parkings_availability.text)["records"]
-    )
-    parkings_availability["fields.grp_nom"] = parkings_availability[
-        "fields.grp_nom"
-    ].apply(lambda cell: f"Parking {cell}")
-    all_parkings_info.rename(
-        columns={"fields.nom_complet": "fields.grp_nom"}, inplace=True
+    all_parkings_info = get_open_data_records(NANTES_PARKINGS_INFO).rename(
+        columns={"fields.nom_complet": "fields.grp_nom"}
     )
+    parkings_availability = get_nantes_parkings_availability()
     merged_parking_data = all_parkings_info.merge(
-        parkings_availability, on="fields.grp_nom"
+        parkings_availability, on="fields.grp_nom", suffixes=("", "_availability")
     )
     return merged_parking_data
 
 
+def get_parking_places(places: typing.Any) -> typing.Optional[int]:
+    """
+    Convert a number of places read from the API, which is missing (NaN) when a park
+    is closed or does not report its availability
+
+    :param places: the number of places
+    :return: the number of places, None if missing
+    """
+    if pd.isna(places):
+        return None
+    return int(places)
+
+
+def get_parking_marker_color(
+    available: typing.Optional[int], capacity: typing.Optional[int]
+) -> str:
+    """
+    Return the parking marker color according to its occupancy rate, grey if it is
+    unknown
+
+    :param available: the number of available places
+    :param capacity: the total number of places
+    :return: the marker color
+    """
+    if available is None or capacity is None:
+        return "grey"
+    if available <= 0:
+        return "red"
+    if capacity > 0 and available / capacity < 0.1:
+        return "orange"
+    return "green"
+
+
+def get_parkings_availability_snapshot(
+    parkings_availability: pd.DataFrame,
+) -> typing.Dict[str, typing.Tuple[int, int]]:
+    """
+    Reduce the parks availability to what changes over time, ie. the number of
+    available places and the capacity of each park. Parks not reporting them are left
+    out.
+
+    :param parkings_availability: the Nantes parks availability
+    :return: the available places and capacity, indexed by park name
+    """
+    return {
+        name: (int(available), int(capacity))
+        for name, available, capacity in zip(
+            parkings_availability["fields.grp_nom"],
+            parkings_availability["fields.grp_disponible"],
+            parkings_availability["fields.grp_exploitation"],
+        )
+        if not pd.isna(available) and not pd.isna(capacity)
+    }
+
+
+def compute_parkings_availability_delta(
+    previous_snapshot: typing.Dict[str, typing.Tuple[int, int]],
+    current_snapshot: typing.Dict[str, typing.Tuple[int, int]],
+) -> typing.Dict[
+    str, typing.Tuple[typing.Optional[int], typing.Optional[int], str]
+]:
+    """
+    Compute the parks whose availability changed between two snapshots. The parks that
+    are no longer in the latest snapshot (missing from the response or not reporting
+    their availability anymore) are sent with an unknown availability.
+
+    :param previous_snapshot: the snapshot already displayed on the client side
+    :param current_snapshot: the latest snapshot
+    :return: the new number of available places, capacity and marker color of the
+    changed parks, indexed by park name
+    """
+    delta = {
+        name: (available, capacity, get_parking_marker_color(available, capacity))
+        for name, (available, capacity) in current_snapshot.items()
+        if previous_snapshot.get(name) != (available, capacity)
+    }
+    for name in previous_snapshot.keys() - current_snapshot.keys():
+        delta[name] = (None, None, get_parking_marker_color(None, None))
+    return delta
+
+
+def record_parkings_availability_snapshot(
+    history: collections.OrderedDict,
+    snapshot: typing.Dict[str, typing.Tuple[int, int]],
+) -> str:
+    """
+    Store a snapshot in the history and drop the oldest ones beyond
+    PARKINGS_AVAILABILITY_HISTORY_SIZE. The version of a snapshot is a hash of its
+    content, so that it designates the same snapshot in every server process, even
+    after a restart.
+
+    :param history: the snapshots indexed by version, oldest first
+    :param snapshot: the snapshot to be recorded
+    :return: the version of the snapshot
+    """
+    version = hashlib.sha1(
+        json.dumps(sorted(snapshot.items())).encode("utf-8")
+    ).hexdigest()
+    history[version] = snapshot
+    history.move_to_end(version)
+    while len(history) > PARKINGS_AVAILABILITY_HISTORY_SIZE:
+        history.popitem(last=False)
+    return version
+
+
+def build_parkings_trace(parkings_info: pd.DataFrame) -> go.Scattermapbox:
+    """
+    Build a single map trace for all parks. Each marker carries its name, address,
+    available places and capacity in customdata so that availability changes can be
+    applied on the client side without rebuilding the figure
+
+    :param parkings_info: the Nantes parks info
+    :return: the parks trace
+    """
+    return go.Scattermapbox(
+        uid="parkings",
+        name="Parkings",
+        lon=parkings_info["geometry.lon"].to_numpy(),
+        lat=parkings_info["geometry.lat"].to_numpy(),
+        mode="markers",
+        customdata=[
+            [
+                name,
+                address,
+                "?" if available is None else available,
+                "?" if capacity is None else capacity,
+            ]
+            for name, address, available, capacity in zip(
+                parkings_info["fields.grp_nom"],
+                parkings_info["fields.adresse"],
+                map(get_parking_places, parkings_info["fields.grp_disponible"]),
+                map(get_parking_places, parkings_info["fields.grp_exploitation"]),
+            )
+        ],
+        hovertemplate="%{customdata[0]}<br>%{customdata[1]}<br>"
+        "%{customdata[2]} sur %{customdata[3]} places disponibles<extra></extra>",
+        showlegend=False,
+        marker={
+            "size": 10,
+            "color": [
+                get_parking_marker_color(available, capacity)
+                for available, capacity in zip(
+                    map(get_parking_places, parkings_info["fields.grp_disponible"]),
+                    map(get_parking_places, parkings_info["fields.grp_exploitation"]),
+                )
+            ],
+        },
+    )
+
+
 def get_tan_stops() -> pd.DataFrame:
     """
     Read and return the "Transports de l'Agglomération Nantaise" (TAN) tramway and bus
@@ -104,8 +288,9 @@ def get_and_parse_tan_lines() -> pd.DataFrame:
     shapes = tan_shapes["shape_id"].unique()
     parsed_tan_shapes = pd.DataFrame(columns=["shape_id", "shape_lat", "shape_lon"])
     for shape in shapes:
-        lat = tan_shapes["shape_pt_lat"].loc[tan_shapes["shape_id"] == shape].to_list()
-        lon = tan_shapes["shape_pt_lon"].loc[tan_shapes["shape_id"] == shape].to_list()
+        shape_points = tan_shapes["shape_id"] == shape
+        lat = tan_shapes["shape_pt_lat"].loc[shape_points].to_numpy()
+        lon = tan_shapes["shape_pt_lon"].loc[shape_points].to_numpy()
         parsed_tan_shapes = parsed_tan_shapes.append(
             pd.Series({"shape_id": shape, "shape_lat": lat, "shape_lon": lon}),
             ignore_index=True,
@@ -120,44 +305,124 @@ def get_and_parse_tan_lines() -> pd.DataFrame:
     return merged
 
 
+def build_tan_routes_stops_incidence() -> typing.Tuple[
+    sp.csr_matrix, np.ndarray, np.ndarray
+]:
+    """
+    Build the sparse incidence matrix between the "Transports de l'Agglomération
+    Nantaise" (TAN) lines and stops from the trips and the stop times
+
+    :return: the lines x stops incidence matrix, the lines and the stops
+    """
+    tan_trips = pd.read_table(
+        TAN_LINES, header=0, sep=",", usecols=["trip_id", "route_id"], dtype=str
+    )
+    tan_stop_times = pd.read_table(
+        TAN_STOP_TIMES, header=0, sep=",", usecols=["trip_id", "stop_id"], dtype=str
+    )
+    tan_trips["route_id"] = tan_trips["route_id"].str.split("-").str[0]
+    routes_stops = tan_stop_times.merge(tan_trips, on="trip_id")[
+        ["route_id", "stop_id"]
+    ].drop_duplicates()
+    route_codes, routes = pd.factorize(routes_stops["route_id"], sort=True)
+    stop_codes, stops = pd.factorize(routes_stops["stop_id"], sort=True)
+    incidence = sp.csr_matrix(
+        (np.ones(len(route_codes), dtype=np.bool_), (route_codes, stop_codes)),
+        shape=(len(routes), len(stops)),
+    )
+    return incidence, routes.to_numpy(dtype=str), stops.to_numpy(dtype=str)
+
+
+def get_tan_routes_stops_index() -> TanRoutesStopsIndex:
+    """
+    Load the "Transports de l'Agglomération Nantaise" (TAN) lines <-> stops index from
+    the outputs folder, building and saving it first if it does not exist or is older
+    than the trips or the stop times
+
+    :return: the lines <-> stops index
+    """
+    if not os.path.exists(TAN_ROUTES_STOPS_INDEX) or os.path.getmtime(
+        TAN_ROUTES_STOPS_INDEX
+    ) < max(os.path.getmtime(TAN_LINES), os.path.getmtime(TAN_STOP_TIMES)):
+        incidence, routes, stops = build_tan_routes_stops_incidence()
+        os.makedirs(os.path.dirname(TAN_ROUTES_STOPS_INDEX), exist_ok=True)
+        np.savez_compressed(
+            TAN_ROUTES_STOPS_INDEX,
+            indptr=incidence.indptr,
+            indices=incidence.indices,
+            routes=routes,
+            stops=stops,
+        )
+    with np.load(TAN_ROUTES_STOPS_INDEX) as saved_index:
+        routes = saved_index["routes"]
+        stops = saved_index["stops"]
+        indices = saved_index["indices"]
+        routes_stops = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.bool_), indices, saved_index["indptr"]),
+            shape=(len(routes), len(stops)),
+        )
+    return TanRoutesStopsIndex(
+        routes_stops=routes_stops,
+        stops_routes=routes_stops.T.tocsr(),
+        routes=routes,
+        stops=stops,
+        route_positions={route: position for position, route in enumerate(routes)},
+        stop_positions={stop: position for position, stop in enumerate(stops)},
+    )
+
+
+def get_stops_of_tan_lines(
+    index: TanRoutesStopsIndex, tan_lines: typing.List[str]
+) -> np.ndarray:
+    """
+    Return the stops served by the selected "Transports de l'Agglomération Nantaise"
+    (TAN) lines, reading only the index rows of these lines
+
+    :param index: the lines <-> stops index
+    :param tan_lines: the names of the selected tan line(s)
+    :return: the ids of the stops served by at least one of the lines
+    """
+    positions = [
+        index.route_positions[line]
+        for line in tan_lines
+        if line in index.route_positions
+    ]
+    matrix = index.routes_stops
+    stop_positions = [
+        matrix.indices[matrix.indptr[position] : matrix.indptr[position + 1]]
+        for position in positions
+    ]
+    if not stop_positions:
+        return index.stops[:0]
+    return index.stops[np.unique(np.concatenate(stop_positions))]
+
+
+def get_tan_lines_of_stop(index: TanRoutesStopsIndex, stop_id: str) -> np.ndarray:
+    """
+    Return the "Transports de l'Agglomération Nantaise" (TAN) lines serving a stop,
+    reading only the index column of this stop
+
+    :param index: the lines <-> stops index
+    :param stop_id: the id of the stop
+    :return: the names of the lines serving the stop
+    """
+    position = index.stop_positions.get(stop_id)
+    if position is None:
+        return index.routes[:0]
+    matrix = index.stops_routes
+    return index.routes[
+        matrix.indices[matrix.indptr[position] : matrix.indptr[position + 1]]
+    ]
+
+
 ##########################################################################################
 #                                       CONSTANTS
 ##########################################################################################
 
+PARKINGS_INFO = get_nantes_parkings_info()
+
 MAP_FIG = {
-    "data": [
-        go.Scattermapbox(
-            # name=row["fields.grp_nom"],
-            # lon=[row["geometry.coordinates"][0]],
-            # lat=[row["geometry.coordinates"][1]],
-            # mode="markers",
-            # textposition="bottom center",
-            # text=f"{row['fields.grp_nom']}<br>"
-            # f"{row['fields.adresse']}<br>"
-            # f"{row['fields.grp_horodatage']}<br>"
-            # f"{row['fields.grp_disponible']}"
-            # f" sur {row['fields.grp_exploitation']} places disponibles<br>",
-            # # f"{row['fields.acces_transports_communs']}",
-            # hoverinfo="text",
-            # showlegend=False,
-            # marker={"symbol": "car", "size": 10},
-        )
-        for _, row in get_nantes_parkings_info().iterrows()
-    ],
-    # + [
-    #     go.Scattermapbox(
-    #         name=row["stop_name"],
-    #         lon=[row["stop_lon"]],
-    #         lat=[row["stop_lat"]],
-    #         mode="markers",
-    #         textposition="bottom center",
-    #         text=f"{row['stop_name']}<br>",
-    #         hoverinfo="text",
-    #         showlegend=False,
-    #         marker={"symbol": "bus", "size": 5},
-    #     )
-    #     for _, row in get_tan_stops().iterrows()
-    # ],
+    "data": [build_parkings_trace(PARKINGS_INFO)],
     "layout": go.Layout(
         height=700,
         hovermode="closest",
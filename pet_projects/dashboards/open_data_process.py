@@ -0,0 +1,120 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Config
+from pet_projects.dashboards.config import OPEN_DATA_REQUEST_TIMEOUT
+
+# Python
+import typing
+import requests
+import orjson
+import threading
+from concurrent.futures import Future
+
+# Data science
+import pandas as pd
+import numpy as np
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+# Requests to the open data API in progress, indexed by url
+IN_FLIGHT_REQUESTS: typing.Dict[str, Future] = {}
+IN_FLIGHT_REQUESTS_LOCK = threading.Lock()
+
+
+##########################################################################################
+#                                       FUNCTIONS
+##########################################################################################
+
+
+def add_record_columns(
+    columns: typing.Dict[str, typing.List], name: str, values: typing.List
+) -> None:
+    """
+    Add the values of a record key to the columns. Nested values are expanded
+    recursively into "<name>.<key>" columns, on the keys found in any record, as
+    json_normalize does. Values that are not nested in the same key are kept in the
+    "<name>" column.
+
+    :param columns: the columns, indexed by name
+    :param name: the name of the record key
+    :param values: the values of the record key, one per record (None if missing)
+    """
+    nested_values = [value for value in values if isinstance(value, dict)]
+    if not nested_values:
+        columns[name] = values
+        return
+    for key in dict.fromkeys(key for value in nested_values for key in value):
+        add_record_columns(
+            columns,
+            f"{name}.{key}",
+            [value.get(key) if isinstance(value, dict) else None for value in values],
+        )
+    if len(nested_values) < sum(value is not None for value in values):
+        columns[name] = [None if isinstance(value, dict) else value for value in values]
+
+
+def parse_open_data_records(content: bytes) -> pd.DataFrame:
+    """
+    Parse an open data API response body into a pd.DataFrame, with the same columns as
+    json_normalize (eg. "recordid", "fields.<field>", "geometry.coordinates"). The body
+    is parsed from bytes by orjson, then the records are gathered key by key and each
+    column is typed by pandas at once. Point geometries are also split into the float
+    columns "geometry.lon" and "geometry.lat".
+
+    :param content: the API response body
+    :return: the records
+    """
+    records = orjson.loads(content)["records"]
+    columns = {}
+    for name in dict.fromkeys(name for record in records for name in record):
+        add_record_columns(columns, name, [record.get(name) for record in records])
+    if any((record.get("geometry") or {}).get("type") == "Point" for record in records):
+        coordinates = np.array(
+            [
+                record["geometry"]["coordinates"]
+                if (record.get("geometry") or {}).get("type") == "Point"
+                else (np.nan, np.nan)
+                for record in records
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        columns["geometry.lon"] = coordinates[:, 0]
+        columns["geometry.lat"] = coordinates[:, 1]
+    return pd.DataFrame(columns)
+
+
+def get_open_data_records(
+    url: str, timeout: float = OPEN_DATA_REQUEST_TIMEOUT
+) -> pd.DataFrame:
+    """
+    Retrieve the records of an open data API endpoint. Concurrent calls for the same url
+    share a single request: the first caller fetches and parses the records while the
+    others wait for its result (or its error) for at most timeout seconds. The shared
+    records must therefore not be modified in place.
+
+    :param url: the API endpoint
+    :param timeout: the maximum time in seconds to wait for the records
+    :return: the records
+    """
+    with IN_FLIGHT_REQUESTS_LOCK:
+        flight = IN_FLIGHT_REQUESTS.get(url)
+        is_leader = flight is None
+        if is_leader:
+            flight = Future()
+            IN_FLIGHT_REQUESTS[url] = flight
+    if not is_leader:
+        return flight.result(timeout=timeout)
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        flight.set_result(parse_open_data_records(response.content))
+    except Exception as error:
+        flight.set_exception(error)
+    finally:
+        with IN_FLIGHT_REQUESTS_LOCK:
+            del IN_FLIGHT_REQUESTS[url]
+    return flight.result()
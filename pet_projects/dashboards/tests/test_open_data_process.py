@@ -0,0 +1,120 @@
+##########################################################################################
+#                                     IMPORT LIBRARIES
+##########################################################################################
+
+# Process
+from pet_projects.dashboards.open_data_process import (
+    IN_FLIGHT_REQUESTS,
+    get_open_data_records,
+)
+
+# Python
+import json
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Test
+import pytest
+import requests
+
+##########################################################################################
+#                                        CONSTANTS
+##########################################################################################
+
+CALLERS_NB = 8
+RESPONSE = json.dumps({"records": [{"recordid": "a", "fields": {"nom": "x"}}]})
+
+##########################################################################################
+#                                        FIXTURES
+##########################################################################################
+
+
+@pytest.fixture
+def fake_api() -> typing.Iterator[typing.Dict]:
+    """
+    Local open data API answering after a delay, with a configurable status, and
+    counting the requests it receives
+
+    :return: the API url, settings and number of requests received
+    """
+    api = {"delay": 0.5, "status": 200, "hits": 0}
+    lock = threading.Lock()
+
+    class FakeApiHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            with lock:
+                api["hits"] += 1
+            time.sleep(api["delay"])
+            body = RESPONSE.encode("utf-8")
+            self.send_response(api["status"])
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), FakeApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api["url"] = f"http://localhost:{server.server_address[1]}/api/records/1.0/search/"
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+def call_concurrently(url: str) -> typing.List[typing.Any]:
+    """
+    Call get_open_data_records from CALLERS_NB threads at once
+
+    :param url: the API endpoint
+    :return: the records or the exception received by each caller
+    """
+    barrier = threading.Barrier(CALLERS_NB)
+
+    def call() -> typing.Any:
+        barrier.wait()
+        try:
+            return get_open_data_records(url)
+        except Exception as error:
+            return error
+
+    with ThreadPoolExecutor(max_workers=CALLERS_NB) as executor:
+        return list(executor.map(lambda _: call(), range(CALLERS_NB)))
+
+
+##########################################################################################
+#                                         TESTS
+##########################################################################################
+
+
+def test_concurrent_callers_share_a_single_request(fake_api: typing.Dict) -> None:
+    results = call_concurrently(f"{fake_api['url']}?dataset=shared")
+    assert fake_api["hits"] == 1
+    assert all(records is results[0] for records in results)
+    assert results[0]["fields.nom"].to_list() == ["x"]
+    assert not IN_FLIGHT_REQUESTS
+
+
+def test_http_error_reaches_every_caller(fake_api: typing.Dict) -> None:
+    fake_api["status"] = 500
+    results = call_concurrently(f"{fake_api['url']}?dataset=error")
+    assert fake_api["hits"] == 1
+    assert all(isinstance(error, requests.HTTPError) for error in results)
+    assert not IN_FLIGHT_REQUESTS
+
+
+def test_waiter_times_out_on_a_slow_leader(fake_api: typing.Dict) -> None:
+    url = f"{fake_api['url']}?dataset=slow"
+    fake_api["delay"] = 1.0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(get_open_data_records, url, 5)
+        while url not in IN_FLIGHT_REQUESTS:
+            time.sleep(0.01)
+        with pytest.raises(TimeoutError):
+            get_open_data_records(url, 0.1)
+        assert leader.result()["fields.nom"].to_list() == ["x"]
+    assert fake_api["hits"] == 1